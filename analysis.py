@@ -9,6 +9,7 @@ Usage:
 """
 
 import csv
+import multiprocessing
 import time
 
 import matplotlib
@@ -17,22 +18,45 @@ import matplotlib.pyplot as plt
 
 from delivery_zones import DeliveryZones
 from dispatch_server import DispatchServer
+from drone import CONSUMPTION_FACTOR, EMPTY_OVERHEAD
+from order import FLAG_FRAG, FLAG_HAZ
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ──────────────────────────────────────────────────────────────────────────────
 
+def _trip_legs(trip: list, delivery_zones: DeliveryZones) -> list:
+    """
+    Return the km flown on each leg of a trip, from the warehouse (zone 0)
+    through every delivery and back to the warehouse.
+    """
+    zones = [order.delivery_zone for order in trip]
+    matrix = delivery_zones.distance_matrix
+    return [matrix[a][b] for a, b in zip([0] + zones, zones + [0])]
+
+
 def _trip_distance(trip: list, delivery_zones: DeliveryZones) -> float:
     """Return the total km flown for a single trip (including return to warehouse)."""
-    prev = 0  # start at warehouse (zone 0)
-    total = 0.0
-    for order in trip:
-        zone = order.get_delivery_zone()
-        total += delivery_zones.distance_between(prev, zone)
+    return float(sum(_trip_legs(trip, delivery_zones)))
+
+
+def _battery_used_kernel(zones: list, weights: list, matrix: list) -> float:
+    """
+    Purely numeric single pass over a trip's zones and weights, returning
+    the battery fraction consumed including the empty return leg.
+    """
+    # Bind constants locally and multiply by the reciprocal inside the loop.
+    empty_overhead = EMPTY_OVERHEAD
+    inv_consumption = 1.0 / CONSUMPTION_FACTOR
+    used = 0.0
+    prev = 0
+    payload = sum(weights)
+    for zone, weight in zip(zones, weights):
+        used += matrix[prev][zone] * (payload + empty_overhead) * inv_consumption
+        payload -= weight
         prev = zone
-    total += delivery_zones.distance_between(prev, 0)  # return leg
-    return total
+    return used + matrix[prev][0] * empty_overhead * inv_consumption
 
 
 def _trip_battery_used(trip: list, delivery_zones: DeliveryZones) -> float:
@@ -40,32 +64,45 @@ def _trip_battery_used(trip: list, delivery_zones: DeliveryZones) -> float:
     Simulate a full trip from zone 0 at 100% charge and return how much
     battery was consumed (0.0 – 1.0).
     """
-    empty_overhead = 512
-    consumption_factor = 36739
-    battery = 1.0
-    prev = 0
-    payload = sum(o.get_weight() for o in trip)
-    for order in trip:
-        dist = delivery_zones.distance_between(prev, order.get_delivery_zone())
-        battery -= dist * (payload + empty_overhead) / consumption_factor
-        payload -= order.get_weight()
-        prev = order.get_delivery_zone()
-    dist = delivery_zones.distance_between(prev, 0)
-    battery -= dist * (0 + empty_overhead) / consumption_factor
-    return 1.0 - battery  # fraction consumed
+    zones = [order.delivery_zone for order in trip]
+    weights = [order.weight for order in trip]
+    return _battery_used_kernel(zones, weights, delivery_zones.distance_matrix)
 
 
 def _fragile_hazardous_violations(trips: list) -> int:
     """Count trips that contain both fragile and hazardous orders."""
     violations = 0
     for trip in trips:
-        has_fragile = any(o.is_fragile() for o in trip)
-        has_hazardous = any(o.is_hazardous() for o in trip)
-        if has_fragile and has_hazardous:
+        trip_flags = 0
+        for o in trip:
+            trip_flags |= o.flags
+        if trip_flags & FLAG_FRAG and trip_flags & FLAG_HAZ:
             violations += 1
     return violations
 
 
+CSV_FIELDNAMES = [
+    'dataset', 'algorithm',
+    'total_trips', 'total_distance_km',
+    'avg_orders_per_trip', 'min_orders_per_trip', 'max_orders_per_trip',
+    'runtime_ms', 'avg_battery_used_pct', 'frag_haz_violations',
+]
+
+
+def _csv_rows(dataset_label: str, comparison: dict):
+    """Yield one CSV row dict per algorithm in a run_comparison() result."""
+    for algo_label, metrics in comparison.items():
+        yield {'dataset': dataset_label, 'algorithm': algo_label, **metrics}
+
+
+def _summary_line(label: str, metrics: dict) -> str:
+    """One console line summarising a run_comparison() result."""
+    return (f'  [{label:>16}] trips={metrics["total_trips"]:4d}  '
+            f'dist={metrics["total_distance_km"]:7.1f} km  '
+            f'runtime={metrics["runtime_ms"]:7.1f} ms  '
+            f'violations={metrics["frag_haz_violations"]}')
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Analyser
 # ──────────────────────────────────────────────────────────────────────────────
@@ -77,18 +114,22 @@ class DeliveryAnalyzer:
         self.delivery_zones = DeliveryZones()
         self.delivery_zones.load_matrix('distances.csv')
 
-    def run_comparison(self, csv_file: str, sort_keys: list, label: str) -> dict:
+    def run_comparison(self, csv_file: str, sort_keys: list, label: str,
+                       verbose: bool = True) -> dict:
         """
         Run the algorithm with the given sort_keys on csv_file and collect metrics.
+        Prints a one-line summary unless verbose is False.
 
         Returns a dict with one key (label) mapping to a nested dict of metrics.
+        runtime_ms is the CPU time schedule_orders takes in this process, so
+        comparisons running side by side in a pool do not inflate each other.
         """
         server = DispatchServer(self.delivery_zones)
         server.load_orders(csv_file)
 
-        t_start = time.perf_counter()
+        t_start = time.process_time()
         server.schedule_orders(sort_keys)
-        t_end = time.perf_counter()
+        t_end = time.process_time()
         runtime_ms = (t_end - t_start) * 1000
 
         trips = server.trips
@@ -109,13 +150,12 @@ class DeliveryAnalyzer:
                                      if n_trips else 0),
             'frag_haz_violations': violations,
         }
-        print(f'  [{label:>16}] trips={n_trips:4d}  '
-              f'dist={sum(distances):7.1f} km  '
-              f'runtime={runtime_ms:7.1f} ms  '
-              f'violations={violations}')
+        if verbose:
+            print(_summary_line(label, metrics))
         return {label: metrics}
 
-    def plot_results(self, all_results: dict, output_path: str = 'analysis.png') -> None:
+    @staticmethod
+    def plot_results(all_results: dict, output_path: str = 'analysis.png') -> None:
         """
         Plot a 2×3 grid of bar charts comparing both algorithms across dataset sizes.
 
@@ -129,12 +169,12 @@ class DeliveryAnalyzer:
             ('total_trips',           'Total Trips',           'Trips'),
             ('total_distance_km',     'Total Distance (km)',   'Km'),
             ('avg_orders_per_trip',   'Avg Orders / Trip',     'Orders'),
-            ('runtime_ms',            'Runtime (ms)',           'ms'),
+            ('runtime_ms',            'CPU Runtime (ms)',       'ms'),
             ('avg_battery_used_pct',  'Avg Battery Used (%)',   '%'),
             ('frag_haz_violations',   'Fragile+Hazardous Violations', 'Count'),
         ]
 
-        fig, axes = plt.subplots(2, 3, figsize=(14, 8))
+        fig, axes = plt.subplots(2, 3, figsize=(14, 8), constrained_layout=True)
         fig.suptitle('Drone Delivery: Sort Key Ordering Comparison',
                      fontsize=14, fontweight='bold')
         axes = axes.flatten()
@@ -157,10 +197,7 @@ class DeliveryAnalyzer:
                 bars = ax.bar([xi + offset for xi in x], vals,
                               bar_width, label=config_lbl,
                               color=colors[config_lbl], alpha=0.85)
-                for bar in bars:
-                    h = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width() / 2, h * 1.01,
-                            f'{h:.1f}', ha='center', va='bottom', fontsize=7)
+                ax.bar_label(bars, fmt='%.1f', fontsize=7, padding=1)
 
             ax.set_title(title, fontsize=10)
             ax.set_ylabel(ylabel, fontsize=9)
@@ -169,34 +206,53 @@ class DeliveryAnalyzer:
             ax.legend(fontsize=8)
             ax.grid(axis='y', linestyle='--', alpha=0.4)
 
-        plt.tight_layout()
         plt.savefig(output_path, dpi=150, bbox_inches='tight')
         print(f'Chart saved to {output_path}')
 
-    def export_to_csv(self, all_results: dict,
+    @staticmethod
+    def export_to_csv(all_results: dict,
                       output_path: str = 'analysis_results.csv') -> None:
         """
         Export comparison results to CSV.
 
         Each row is one (dataset_size, algorithm) combination.
         """
-        fieldnames = [
-            'dataset', 'algorithm',
-            'total_trips', 'total_distance_km',
-            'avg_orders_per_trip', 'min_orders_per_trip', 'max_orders_per_trip',
-            'runtime_ms', 'avg_battery_used_pct', 'frag_haz_violations',
-        ]
         with open(output_path, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
             writer.writeheader()
             for dataset_label, comparison in all_results.items():
-                for algo_label, metrics in comparison.items():
-                    row = {'dataset': dataset_label, 'algorithm': algo_label}
-                    row.update(metrics)
-                    writer.writerow(row)
+                writer.writerows(_csv_rows(dataset_label, comparison))
         print(f'Results exported to {output_path}')
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Worker pool
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Each worker process builds its own analyzer (and distance matrix) once.
+_worker_analyzer = None
+
+
+def _init_worker() -> None:
+    """Pool initializer: create this process's DeliveryAnalyzer."""
+    global _worker_analyzer
+    _worker_analyzer = DeliveryAnalyzer()
+
+
+def _run_job(job: tuple) -> tuple:
+    """
+    Run one (dataset_label, csv_file, sort_keys, config_label) comparison in
+    a worker process. The summary line is left to the parent, which prints
+    results in job order as they arrive.
+
+    Returns (dataset_label, comparison dict from run_comparison()).
+    """
+    dataset_label, csv_file, sort_keys, config_label = job
+    return dataset_label, _worker_analyzer.run_comparison(csv_file, sort_keys,
+                                                          config_label,
+                                                          verbose=False)
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Main
 # ──────────────────────────────────────────────────────────────────────────────
@@ -215,16 +271,28 @@ if __name__ == '__main__':
         ('Real-world', ['priority_score', 'delivery_zone', 'timestamp']),
     ]
 
-    analyzer = DeliveryAnalyzer()
+    # Every (dataset, config) pair is independent, so run them across a
+    # process pool. Rows are written to the CSV as each result arrives; only
+    # the summary needed for plotting is kept in memory.
+    jobs = [(dataset_label, csv_file, sort_keys, config_label)
+            for dataset_label, csv_file in datasets
+            for config_label, sort_keys in CONFIGS]
+    csv_path = 'analysis_results_2.csv'
     all_results = {}
-
-    for dataset_label, csv_file in datasets:
-        print(f'\n--- {dataset_label} ---')
-        comparison = {}
-        for config_label, sort_keys in CONFIGS:
-            result = analyzer.run_comparison(csv_file, sort_keys, config_label)
-            comparison.update(result)
-        all_results[dataset_label] = comparison
-
-    analyzer.plot_results(all_results, output_path='analysis_2.png')
-    analyzer.export_to_csv(all_results, output_path='analysis_results_2.csv')
+    with open(csv_path, 'w', newline='') as f, \
+            multiprocessing.Pool(initializer=_init_worker) as pool:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        # imap yields results in job order, so datasets and configs keep
+        # their order in both the CSV and the chart.
+        for dataset_label, result in pool.imap(_run_job, jobs):
+            if dataset_label not in all_results:
+                print(f'\n--- {dataset_label} ---')
+            for config_label, metrics in result.items():
+                print(_summary_line(config_label, metrics))
+            writer.writerows(_csv_rows(dataset_label, result))
+            f.flush()
+            all_results.setdefault(dataset_label, {}).update(result)
+    print(f'Results exported to {csv_path}')
+
+    DeliveryAnalyzer.plot_results(all_results, output_path='analysis_2.png')
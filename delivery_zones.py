@@ -3,6 +3,28 @@ Returns the distance in kilometers between the centers of the given origin
 and destination zones.
 """
 import csv
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _read_matrix(csv_file_name):
+  """
+  Parses a distance CSV into a tuple of row tuples. Cached by file name, so
+  each process parses a given file once however many DeliveryZones load it.
+  """
+  with open(csv_file_name, "r") as csvfile:
+    reader = csv.reader(csvfile, delimiter=",")
+    num_cells = int(next(reader)[0])
+    rows = [(0,) * num_cells] * num_cells
+
+    # Parse each row in one pass rather than one add_distance call per cell
+    origin = 0
+    for line in reader:
+      if line:
+        rows[origin] = tuple(int(cell) for cell in line)
+      origin += 1
+  return tuple(rows)
+
 
 class DeliveryZones(object):
 
@@ -15,20 +37,12 @@ class DeliveryZones(object):
   def load_matrix(self, csv_file_name):
     print("Loading distance info from " + csv_file_name)
     try:
-      with open(csv_file_name, "r") as csvfile:
-        reader = csv.reader(csvfile, delimiter=",")
-        first_line = next(reader)[0]
-        num_cells = int(first_line)
-        self.distance_matrix = [[0] * num_cells for _ in range(num_cells)]
-
-        origin = 0
-        for line in reader:
-          if line:
-            for destination in range(len(line)):
-              self.add_distance(origin, destination, int(line[destination]))
-          origin += 1
+      rows = _read_matrix(csv_file_name)
     except IOError as e:
       print(f"Error importing order from {csv_file_name}\n {e}")
+      return
+    # Copy the cached rows so add_distance never edits another instance's matrix
+    self.distance_matrix = [list(row) for row in rows]
 
   def distance_between(self, origin_zone, destination_zone):
     """
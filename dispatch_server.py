@@ -1,82 +1,89 @@
 import csv
 import heapq
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
 from drone import DeliveryException
 from drone import Drone
-from order import Order
+from order import FLAG_FRAG, FLAG_HAZ, Order
 
 
-_KEY_EXTRACTORS = {
-    'user_id':        lambda o: o.get_user_id(),
-    'delivery_zone':  lambda o: o.get_delivery_zone(),
-    'timestamp':      lambda o: o.get_timestamp(),
-    'priority_score': lambda o: (0 if o.is_perishable() else 2) + (0 if o.is_subscriber() else 1),
+# Order attribute behind each schedule_orders sort key.
+_KEY_ATTRS = {
+    'user_id':        'user_id',
+    'delivery_zone':  'delivery_zone',
+    'timestamp':      'timestamp',
+    'priority_score': 'priority_score',
 }
 
+_PRIORITY_KEY = attrgetter('priority_key')
+
+
+@lru_cache(maxsize=None)
+def _composite_key_getter(sort_keys):
+  """
+  Returns a key function building (*sort_keys, order_id) for an order, with
+  order_id as the deterministic final tiebreaker. The function is generated
+  once per sort_keys tuple, so each call is a single tuple build of plain
+  attribute loads. Attribute names come only from _KEY_ATTRS.
+  """
+  fields = ''.join(f'o.{_KEY_ATTRS[k]}, ' for k in sort_keys)
+  return eval(f'lambda o: ({fields}o.order_id,)', {})
+
 
 class DispatchServer(object):
 
   def __init__(self, delivery_zones):
     self.delivery_zones = delivery_zones
     self.trips = []
-    self.unpackaged_orders = []
+    # Orders not yet in a trip, keyed by id(order) in arrival order
+    self.unpackaged_orders = OrderedDict()
     self.delivery_drone = Drone(delivery_zones)
     self.payload_test_drone = Drone(delivery_zones)
 
 
   def _priority_key(self, order):
     """
-    Composite key for the optimal-path min-heap: (priority_score, timestamp, delivery_zone, order_id).
+    Composite sort key for the optimal path: (priority_score, timestamp, delivery_zone, order_id).
     Lower priority_score = higher urgency. delivery_zone then order_id as tiebreakers;
-    order_id guarantees a total order and deterministic heap behavior.
+    order_id guarantees a total order and a deterministic sort.
     """
-    priority_score = (0 if order.is_perishable() else 2) + (0 if order.is_subscriber() else 1)
-    return (priority_score, order.get_timestamp(), order.get_delivery_zone(), order.get_order_id())
+    return order.priority_key
   
   def build_composite_key(self, order, sort_keys):
     """
-    Composite key for the optimal-path min-heap built dynamically from sort_keys.
+    Composite sort key built dynamically from sort_keys.
     Always appends order_id as the deterministic final tiebreaker.
     """
-    key = tuple(_KEY_EXTRACTORS[k](order) for k in sort_keys)
-    return key + (order.get_order_id(),)
+    return _composite_key_getter(tuple(sort_keys))(order)
   
   def package_trips(self):
     """
-    Organizes unpackaged orders into trips using the priority queue (min-heap).
-    Orders are dequeued by (priority_score, timestamp, delivery_zone, order_id).
+    Organizes unpackaged orders into trips in priority order.
+    Orders are taken by (priority_score, timestamp, delivery_zone, order_id).
     """
     self._package_trips_optimal()
 
   def _package_trips_optimal(self):
     """
-    Optimal path: min-heap priority queue. Orders dequeued by (priority_score,
-    timestamp, delivery_zone, order_id). heapq.heappush/heappop maintain the heap invariant.
+    Optimal path: orders are sorted once by (priority_score, timestamp,
+    delivery_zone, order_id) and trips are built from the front of that list.
+    Priorities are static during packaging and nothing is inserted once
+    packaging starts, so a single sort gives the same order a min-heap would.
     """
-    # Load orders into min-heap with composite key (priority_score, timestamp, delivery_zone, order_id)
-    heap = []
-    for order in self.unpackaged_orders:
-      key = self._priority_key(order)
-      heapq.heappush(heap, (key, order))
-
-    while heap:
-      # Pop all from heap; they come out in priority order.
-      items = [heapq.heappop(heap) for _ in range(len(heap))]
-      orders_only = [o for _, o in items]
-
-      trip = self.build_most_optimal_trip(orders_only)
+    pending = OrderedDict(
+        (id(o), o)
+        for o in sorted(self.unpackaged_orders.values(), key=_PRIORITY_KEY))
+
+    while pending:
+      trip = self.build_most_optimal_trip(pending.values())
       if not trip:
-        # No trip could be built; put all back and stop.
-        for key, o in items:
-          heapq.heappush(heap, (key, o))
-        break
+        break  # remaining orders all oversized or battery-impossible; stop
 
-      # Remove trip orders from unpackaged_orders; push back the rest to heap.
+      # Drop only the trip's orders; the rest stay in priority order.
       for order in trip:
-        self.unpackaged_orders.remove(order)
-      trip_set = set(trip)
-      for key, o in items:
-        if o not in trip_set:
-          heapq.heappush(heap, (key, o))
+        del pending[id(order)]
+        del self.unpackaged_orders[id(order)]
 
       self.trips.append(trip)
 
@@ -86,18 +93,21 @@ class DispatchServer(object):
     Orders are processed in the sequence given; no fragile/hazardous/perishable logic.
     Skips any order that would exceed the weight limit or exhaust the battery.
     """
+    test_drone = self.payload_test_drone
+    weight_limit = test_drone.weight_limit
     trip = []
     current_weight = 0
     for order in orders:
-      if current_weight + order.get_weight() > self.payload_test_drone.weight_limit:
+      weight = order.weight
+      if current_weight + weight > weight_limit:
         continue
-      best_pos = self.payload_test_drone.find_best_order_position(order)
+      best_pos = test_drone.find_best_order_position(order)
       if best_pos >= 0:
-        self.payload_test_drone.add_order(order, best_pos)
+        test_drone.add_order(order, best_pos)
         trip.append(order)
-        current_weight += order.get_weight()
-    trip = list(self.payload_test_drone.get_orders())
-    self.payload_test_drone.remove_all_orders()
+        current_weight += weight
+    trip = test_drone.get_orders()
+    test_drone.remove_all_orders()
     return trip
 
   def schedule_orders(self, sort_keys):
@@ -108,19 +118,18 @@ class DispatchServer(object):
     Sort all unpackaged orders once by sort_keys, then greedily fill trips
     using build_trip until no orders remain or none can fit.
     """
-    heap = []
-    for order in self.unpackaged_orders:
-      heapq.heappush(heap, (self.build_composite_key(order, sort_keys), order))
-    orders = []
-    while heap:
-      _, order = heapq.heappop(heap)
-      orders.append(order)
+    # sorted() computes each key once (decorate-sort-undecorate in C) using the
+    # key function specialized for these sort_keys.
+    orders = OrderedDict(
+        (id(o), o)
+        for o in sorted(self.unpackaged_orders.values(),
+                        key=_composite_key_getter(tuple(sort_keys))))
     while orders:
-      trip = self.build_trip(orders)
+      trip = self.build_trip(orders.values())
       if not trip:
         break  # remaining orders all oversized or battery-impossible; stop
-      trip_set = set(id(o) for o in trip)
-      orders = [o for o in orders if id(o) not in trip_set]
+      for order in trip:
+        del orders[id(order)]
       self.trips.append(trip)
 
   def deliver_orders(self):
@@ -146,50 +155,66 @@ class DispatchServer(object):
     - Same customer orders together (when they fit)
     - Never mix fragile and hazardous in same trip
     Does not mutate orders; caller is responsible for removing trip orders.
-    Expects orders to already be in priority order (e.g. from the min-heap).
+    Expects orders to already be in priority order (e.g. sorted by _priority_key).
     """
     if not orders:
       return []
 
-    # Already in priority order from heap
-    first = orders[0]
+    # Already in priority order from the caller
+    first = next(iter(orders))
 
     trip = []
-    trip_has_fragile = False
-    trip_has_hazardous = False
+    trip_flags = 0  # union of the flags of every order in the trip
+    trip_weight = 0
+    added_ids = set()  # ids of orders placed during customer consolidation
+    weight_limit = self.payload_test_drone.weight_limit
+
+    def can_add(order):
+      """True if order fits under the drone's payload cap given the trip so far."""
+      return trip_weight + order.weight <= weight_limit
 
     # Lazy customer consolidation: iterate same-customer orders on demand; stop when one doesn't fit.
-    customer_id = first.get_user_id()
-    customer_orders = (o for o in orders if o.get_user_id() == customer_id and can_add(o))
+    customer_id = first.user_id
+    customer_orders = (o for o in orders if o.user_id == customer_id and can_add(o))
     for order in customer_orders:
-      if order.is_fragile() and trip_has_hazardous:
+      if order.flags & FLAG_FRAG and trip_flags & FLAG_HAZ:
         continue
-      if order.is_hazardous() and trip_has_fragile:
+      if order.flags & FLAG_HAZ and trip_flags & FLAG_FRAG:
         continue
       best_pos = self.payload_test_drone.find_best_order_position(order)
       if best_pos >= 0:
         self.payload_test_drone.add_order(order, best_pos)
         trip.append(order)
-        trip_has_fragile = trip_has_fragile or order.is_fragile()
-        trip_has_hazardous = trip_has_hazardous or order.is_hazardous()
+        added_ids.add(id(order))
+        trip_flags |= order.flags
+        trip_weight += order.weight
 
     # Fill remaining capacity: heaviest to lightest, with zone and order_id for stable sort.
-    remaining = [o for o in orders if o not in trip and can_add(o)]
-    remaining.sort(key=lambda o: (-o.get_weight(), o.get_delivery_zone(), o.get_order_id()))
-    for order in remaining:
-      if order.is_fragile() and trip_has_hazardous:
+    # Candidates are popped lazily from a heap (the list index keeps ties stable),
+    # and filling stops once even the lightest candidate is over the payload cap,
+    # so the unused tail is never fully ordered.
+    remaining = [(-o.weight, o.delivery_zone, o.order_id, i, o)
+                 for i, o in enumerate(orders)
+                 if id(o) not in added_ids and can_add(o)]
+    lightest = min((o.weight for *_, o in remaining), default=0)
+    heapq.heapify(remaining)
+    while remaining and trip_weight + lightest <= weight_limit:
+      order = heapq.heappop(remaining)[-1]
+      if not can_add(order):
+        continue
+      if order.flags & FLAG_FRAG and trip_flags & FLAG_HAZ:
         continue
-      if order.is_hazardous() and trip_has_fragile:
+      if order.flags & FLAG_HAZ and trip_flags & FLAG_FRAG:
         continue
       best_pos = self.payload_test_drone.find_best_order_position(order)
       if best_pos >= 0:
         self.payload_test_drone.add_order(order, best_pos)
         trip.append(order)
-        trip_has_fragile = trip_has_fragile or order.is_fragile()
-        trip_has_hazardous = trip_has_hazardous or order.is_hazardous()
+        trip_flags |= order.flags
+        trip_weight += order.weight
 
     # Return orders in optimal delivery order (as positioned by find_best_order_position)
-    trip = list(self.payload_test_drone.get_orders())
+    trip = self.payload_test_drone.get_orders()
     self.payload_test_drone.remove_all_orders()
     return trip
 
@@ -197,16 +222,13 @@ class DispatchServer(object):
     print('Loading order info from ' + csv_file_name)
     with open(csv_file_name, 'r') as csvfile:
       reader = csv.reader(csvfile, delimiter=',')
-      for parsed_line in reader:
-        self.add_order(int(parsed_line[0]),
-                       int(parsed_line[1]),
-                       int(parsed_line[2]),
-                       int(parsed_line[3]),
-                       int(parsed_line[4]),
-                       parsed_line[5] == 'TRUE',
-                       parsed_line[6] == 'TRUE', 
-                       parsed_line[7] == 'TRUE',
-                       parsed_line[8] == 'TRUE')
+      # Convert each row's integer and flag columns in bulk rather than
+      # indexing and converting every field separately, and add the whole
+      # file's orders in one update.
+      orders = (Order(*map(int, parsed_line[:5]),
+                      *(flag == 'TRUE' for flag in parsed_line[5:9]))
+                for parsed_line in reader)
+      self.unpackaged_orders.update((id(order), order) for order in orders)
 
   def add_order(self, order_id=0, timestamp=0, zone=0,
                 weight=0, user_id=0, subscriber=False, fragile=False,
@@ -215,4 +237,4 @@ class DispatchServer(object):
     order = Order(order_id, timestamp, zone, weight, user_id, subscriber,
                     fragile, hazardous, perishable)
 
-    self.unpackaged_orders.append(order)
+    self.unpackaged_orders[id(order)] = order
@@ -1,18 +1,67 @@
+import logging
 import time
 import traceback
-from functools import lru_cache
 
 from delivery_zones import DeliveryZones
 
-# Memoized battery drain: (weight, distance) -> fraction of battery. Shared across all drones.
+logger = logging.getLogger(__name__)
+
+# Battery model: a leg of distance km carrying weight grams drains
+# distance * (weight + EMPTY_OVERHEAD) / CONSUMPTION_FACTOR of a full charge.
 CONSUMPTION_FACTOR = 36739
 EMPTY_OVERHEAD = 512
 
 
-@lru_cache(maxsize=None)
-def _battery_drain(weight, distance):
-  """Pure function: fraction of battery consumed for this segment. Cached by (weight, distance)."""
-  return distance * (weight + EMPTY_OVERHEAD) / CONSUMPTION_FACTOR
+def _simulate(weights, zones, distance_matrix, battery_charge):
+  """
+  Numeric trip kernel: flies parallel lists of weights and zones (in delivery
+  order) out of the warehouse and back, starting from battery_charge. Returns
+  the charge left on return, or -1 if the battery dies on the way. Takes only
+  numbers and the distance matrix, no Drone or Order objects.
+  """
+  payload_weight = sum(weights)
+  previous_destination = 0
+  for zone, weight in zip(zones, weights):
+    battery_charge -= (distance_matrix[previous_destination][zone] *
+                       (payload_weight + EMPTY_OVERHEAD) / CONSUMPTION_FACTOR)
+    if battery_charge < 0:
+      return -1
+    payload_weight -= weight
+    previous_destination = zone
+
+  battery_charge -= (distance_matrix[previous_destination][0] *
+                     EMPTY_OVERHEAD / CONSUMPTION_FACTOR)
+  if battery_charge < 0:
+    return -1
+  return battery_charge
+
+
+def _max_insertion_weight(weights, zones, distance_matrix, new_zone):
+  """
+  Upper bound on the weight of an order to new_zone that could still be added
+  at some position of the given trip, or -1 if none could. The charge left is
+  linear in the new order's weight: at position i it is
+  A_i - weight * D_i / CONSUMPTION_FACTOR, where A_i is the charge left with a
+  weightless stop at new_zone and D_i the km flown before reaching it. Returns
+  the best A_i * CONSUMPTION_FACTOR / D_i over positions, padded slightly so
+  float rounding in _simulate can never disagree with it.
+  """
+  bound = -1
+  flown = 0  # km flown from the warehouse to the stop before position i
+  previous_destination = 0
+  for i in range(len(zones) + 1):
+    if i:
+      flown += distance_matrix[previous_destination][zones[i - 1]]
+      previous_destination = zones[i - 1]
+    charge = _simulate(weights[:i] + [0] + weights[i:],
+                       zones[:i] + [new_zone] + zones[i:], distance_matrix, 1)
+    if charge < 0:
+      continue
+    distance = flown + distance_matrix[previous_destination][new_zone]
+    if distance == 0:
+      return float('inf')  # the order is never carried, so weight is free
+    bound = max(bound, charge * CONSUMPTION_FACTOR / distance)
+  return bound * (1 + 1e-9) + 1e-9 if bound >= 0 else -1
 
 
 class Drone(object):
@@ -22,20 +71,37 @@ class Drone(object):
     self.weight_limit = weight_limit  # hard payload cap in grams
     self.battery_charge = 1
     self.orders = []
+    # Zones and weights of self.orders, kept in step with it so simulations
+    # run over plain number lists instead of re-reading every Order
+    self.order_zones = []
+    self.order_weights = []
+    # Heaviest order per zone that could still be placed given the current
+    # orders (see _max_insertion_weight). Cleared whenever the orders change.
+    self.weight_bounds = {}
 
   def get_orders(self):
-    """Returns the list of orders that this drone has committed to deliver."""
-    return self.orders
+    """
+    Returns a copy of the list of orders that this drone has committed to
+    deliver. Use add_order and remove_all_orders to change the payload, so the
+    zone and weight lists kept alongside it stay in step.
+    """
+    return list(self.orders)
 
   def add_order(self, order, position):
     """
     Adds the given order to the drone's list of orders at a given position.
     """
     self.orders.insert(position, order)
+    self.order_zones.insert(position, order.delivery_zone)
+    self.order_weights.insert(position, order.weight)
+    self.weight_bounds = {}
 
   def remove_all_orders(self):
     """Removes all orders from the drone."""
     self.orders = []
+    self.order_zones = []
+    self.order_weights = []
+    self.weight_bounds = {}
 
   def deliver_orders(self):
     """
@@ -43,6 +109,10 @@ class Drone(object):
     during the trip, it will throw a DeliveryException.
     """
     self.battery_charge = self.run_trip(self.orders, False)
+    # run_trip drops delivered orders from self.orders; match the number lists
+    self.order_zones = [order.delivery_zone for order in self.orders]
+    self.order_weights = [order.weight for order in self.orders]
+    self.weight_bounds = {}
     if self.battery_charge < 0:
       raise DeliveryException("Drone battery died during trip!")
 
@@ -58,48 +128,54 @@ class Drone(object):
     determining whether a drone will be able to complete a trip, given a
     particular list of orders.
     """
-    previous_destination = 0
-    payload_weight = 0
-    battery_charge = 0
-    for order in orders:
-      payload_weight += order.get_weight()
+    # Read each order's weight once; the loop below reuses it
+    weights = [order.weight for order in orders]
 
     if simulated_trip:
       # We'll be simulating the trip, so we can assume a fully charged drone
-      battery_charge = 1
-    else: 
-      # Actually deliver the orders, using the drone's current charge
-      battery_charge = self.battery_charge
-      print('Headed out for delivery:')
+      return self.simulate_payload(
+        [order.delivery_zone for order in orders], weights)
+
+    previous_destination = 0
+    payload_weight = sum(weights)
+    # Actually deliver the orders, using the drone's current charge
+    battery_charge = self.battery_charge
+    logger.info('Headed out for delivery:')
+
+    # Each leg's drain is computed inline with the same expression _simulate
+    # uses, so a delivery uses exactly the charge its simulation predicted
+    distance_matrix = self.delivery_zones.distance_matrix
+    # Per-order progress is debug output; check the level once per trip so a
+    # quiet run skips the logging calls entirely
+    log_orders = logger.isEnabledFor(logging.DEBUG)
 
     delivered_order_count = 0
-    for order in orders:
-      if not simulated_trip:
-        print(f'  Delivering Order #{order.get_order_id()}' +
-              f' to zone {order.get_delivery_zone()}...')
+    for order, weight in zip(orders, weights):
+      zone = order.delivery_zone
+      if log_orders:
+        logger.debug('  Delivering Order #%d to zone %d...',
+                     order.order_id, zone)
 
       # Update drone battery, payload weight, and previous desination after
       # delivering the order
-      battery_charge -= self.get_percent_battery_required(payload_weight,
-        self.delivery_zones.distance_between(previous_destination,
-          order.get_delivery_zone()))
-      payload_weight -= order.get_weight()
-      previous_destination = order.get_delivery_zone()
+      battery_charge -= (distance_matrix[previous_destination][zone] *
+                         (payload_weight + EMPTY_OVERHEAD) / CONSUMPTION_FACTOR)
+      payload_weight -= weight
+      previous_destination = zone
 
       # Exit the loop if the battery dies during the trip
       if battery_charge < 0:
         return -1
-      elif not simulated_trip:
-        delivered_order_count += 1
-        print('    Complete!')
-
-    # If this is a real trip, remove delivered orders from the list
-    if not simulated_trip:
-      for _ in range(delivered_order_count):
-        orders.pop(0)
+      delivered_order_count += 1
+      if log_orders:
+        logger.debug('    Complete!')
+
+    # Remove delivered orders from the list in one slice deletion rather
+    # than one O(n) pop(0) per order
+    del orders[:delivered_order_count]
     
-    battery_charge -= self.get_percent_battery_required(0,
-      self.delivery_zones.distance_between(previous_destination, 0))
+    battery_charge -= (distance_matrix[previous_destination][0] *
+                       EMPTY_OVERHEAD / CONSUMPTION_FACTOR)
 
     if battery_charge < 0:
       return -1
@@ -111,11 +187,22 @@ class Drone(object):
     of the orders already in its order list, plus the given new_order (which
     would be added to the order list at the given position).
     """
-    simulated_orders = self.orders.copy()
-    simulated_orders.insert(position, new_order)
-    battery = self.run_trip(simulated_orders, True)
+    zones = self.order_zones.copy()
+    zones.insert(position, new_order.delivery_zone)
+    weights = self.order_weights.copy()
+    weights.insert(position, new_order.weight)
+    battery = self.simulate_payload(zones, weights)
     return battery if battery >= 0 else -1
 
+  def simulate_payload(self, zones, weights):
+    """
+    Simulates a trip from the warehouse on a full charge, delivering a payload
+    given as parallel lists of destination zones and weights (in delivery
+    order). Returns the battery charge left on return, or -1 if the battery
+    dies on the way.
+    """
+    return _simulate(weights, zones, self.delivery_zones.distance_matrix, 1)
+
   def find_best_order_position(self, new_order):
     """
     Returns the index of the best position to add an order to the drone's
@@ -124,10 +211,30 @@ class Drone(object):
     no positions where the order can be added without the drone failing its
     trip, returns -1.
     """
+    # Rule out orders too heavy to fit anywhere before simulating every
+    # position. The bound is computed once per zone for the current orders.
+    zone = new_order.delivery_zone
+    weight = new_order.weight
+    distance_matrix = self.delivery_zones.distance_matrix
+    weight_bound = self.weight_bounds.get(zone)
+    if weight_bound is None:
+      weight_bound = _max_insertion_weight(self.order_weights, self.order_zones,
+                                           distance_matrix, zone)
+      self.weight_bounds[zone] = weight_bound
+    if weight > weight_bound:
+      return -1
+
+    # Start with the new order first, then walk it one slot to the right per
+    # position with a swap, so each candidate list costs O(1) to build.
+    zones = [zone] + self.order_zones
+    weights = [weight] + self.order_weights
     best_position = -1
     best_battery = -1
-    for i in range(len(self.orders) + 1):
-      battery = self.simulate_trip_with_added_order(new_order, i)
+    for i in range(len(zones)):
+      if i:
+        zones[i - 1], zones[i] = zones[i], zones[i - 1]
+        weights[i - 1], weights[i] = weights[i], weights[i - 1]
+      battery = _simulate(weights, zones, distance_matrix, 1)
       if battery > best_battery:
         best_battery = battery
         best_position = i
@@ -140,9 +247,9 @@ class Drone(object):
   def get_percent_battery_required(self, weight, distance):
     """
     Given a payload weight in grams and a distance in kilometers, returns
-    the fraction of battery this segment would consume. Memoized by (weight, distance).
+    the fraction of battery this segment would consume.
     """
-    return _battery_drain(weight, distance)
+    return distance * (weight + EMPTY_OVERHEAD) / CONSUMPTION_FACTOR
 
 
 class DeliveryException(Exception):
@@ -1,5 +1,22 @@
+# Bits of Order.flags
+FLAG_SUB = 1   # subscriber
+FLAG_FRAG = 2  # fragile
+FLAG_HAZ = 4   # hazardous
+FLAG_PER = 8   # perishable
+
+# priority_score for every flags value (lower is more urgent):
+# 0 perishable + subscriber, 1 perishable only, 2 subscriber only, 3 neither
+_PRIORITY_SCORES = tuple((0 if flags & FLAG_PER else 2) + (0 if flags & FLAG_SUB else 1)
+                         for flags in range(16))
+
+
 class Order(object):
 
+  # Fixed attribute set: no per-instance __dict__, and attribute reads are slot lookups
+  __slots__ = ('order_id', 'timestamp', 'delivery_zone', 'weight', 'user_id',
+               'subscriber', 'fragile', 'hazardous', 'perishable', 'flags',
+               'priority_score', 'priority_key')
+
   def __init__(self, order_id, order_timestamp, delivery_zone, weight, user_id,
                subscriber, fragile, hazardous, perishable):
     self.order_id = order_id
@@ -11,6 +28,13 @@ class Order(object):
     self.fragile = fragile
     self.hazardous = hazardous
     self.perishable = perishable
+    # Packed copy of the four booleans so constraint checks are integer ANDs
+    self.flags = ((FLAG_SUB if subscriber else 0) | (FLAG_FRAG if fragile else 0) |
+                  (FLAG_HAZ if hazardous else 0) | (FLAG_PER if perishable else 0))
+    self.priority_score = _PRIORITY_SCORES[self.flags]
+    # Optimal-path sort key, built once so sorting is a single attribute load
+    self.priority_key = (self.priority_score, order_timestamp, delivery_zone,
+                         order_id)
 
   def get_order_id(self):
     return self.order_id
@@ -39,6 +63,15 @@ class Order(object):
   def is_perishable(self):
     return self.perishable
 
+  def get_flags(self):
+    return self.flags
+
+  def get_priority_score(self):
+    return self.priority_score
+
+  def get_priority_key(self):
+    return self.priority_key
+
   def __str__(self):
     return (f"Order {self.order_id} at {self.timestamp} to {self.delivery_zone}"
             f" ({self.weight}g)")
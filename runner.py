@@ -1,3 +1,6 @@
+import logging
+import sys
+
 from delivery_zones import DeliveryZones
 from dispatch_server import DispatchServer
 from drone import Drone
@@ -33,4 +36,6 @@ class Runner:
     #  Feel free to put any println statements below for testing and debugging
 
 if __name__ == "__main__":
+    # INFO shows each trip departing; use DEBUG to also see every order delivered
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     Runner().run()